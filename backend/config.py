@@ -1,8 +1,10 @@
 import os
+from dataclasses import dataclass
 from typing import Optional
 
+@dataclass(frozen=True, slots=True)
 class Settings:
-    """Application settings"""
+    """Application settings, read from the environment once at import"""
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./video_editor.db")
@@ -16,14 +18,25 @@ class Settings:
     UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "./uploads")
     THUMBNAIL_DIR: str = os.getenv("THUMBNAIL_DIR", "./thumbnails")
     MAX_FILE_SIZE: int = 100 * 1024 * 1024  # 100MB
+    # When set (e.g. "/protected/"), raw media downloads are handed off to
+    # NGINX via X-Accel-Redirect instead of being streamed by the app
+    X_ACCEL_REDIRECT_PREFIX: Optional[str] = os.getenv("X_ACCEL_REDIRECT_PREFIX")
+    
+    # Transcription
+    WHISPER_MODEL: str = os.getenv("WHISPER_MODEL", "base")
+    WHISPER_DEVICE: str = os.getenv("WHISPER_DEVICE", "auto")  # 'auto', 'cpu' or 'cuda'
+    WHISPER_COMPUTE_TYPE: Optional[str] = os.getenv("WHISPER_COMPUTE_TYPE")  # Defaults to int8 / int8_float16
+    WHISPER_BATCH_SIZE: int = int(os.getenv("WHISPER_BATCH_SIZE", 16))
+    TRANSCRIPTION_WORKERS: int = int(os.getenv("TRANSCRIPTION_WORKERS", max(1, (os.cpu_count() or 2) // 2)))
+    TRANSCRIPTION_MAX_PENDING: int = int(os.getenv("TRANSCRIPTION_MAX_PENDING", 16))
     
     # CORS
-    ALLOWED_ORIGINS: list = [
+    ALLOWED_ORIGINS: tuple = (
         "http://localhost:3000",
         "http://localhost:5173",
         "http://127.0.0.1:3000",
         "http://127.0.0.1:5173"
-    ]
+    )
     
     # Cloud Storage (for future implementation)
     AWS_ACCESS_KEY_ID: Optional[str] = os.getenv("AWS_ACCESS_KEY_ID")
@@ -1,16 +1,29 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
+
+from config import settings
 
 # Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./video_editor.db")
+DATABASE_URL = settings.DATABASE_URL
+
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
 
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
+    connect_args={"check_same_thread": False} if IS_SQLITE else {}
 )
 
+if IS_SQLITE:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune each new SQLite connection for concurrent API workers"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer
+        cursor.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL, fewer fsyncs
+        cursor.execute("PRAGMA cache_size=-65536")  # 64MB page cache per connection
+        cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
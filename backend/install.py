@@ -2,6 +2,8 @@
 """
 Installation script for the AI Video Editor backend
 """
+import functools
+import shutil
 import subprocess
 import sys
 import os
@@ -19,25 +21,23 @@ def install_requirements():
         print(f"✗ Failed to install dependencies: {e}")
         return False
 
+@functools.lru_cache(maxsize=1)
 def check_ffmpeg():
-    """Check if FFmpeg is available"""
-    try:
-        subprocess.run(["ffmpeg", "-version"], 
-                      capture_output=True, check=True)
+    """Check if FFmpeg is available on PATH (cached, no subprocess spawned)"""
+    if shutil.which("ffmpeg") is not None:
         print("✓ FFmpeg is available")
         return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        print("⚠ FFmpeg not found. Please install FFmpeg:")
-        print("  Windows: Download from https://ffmpeg.org/download.html")
-        print("  macOS: brew install ffmpeg")
-        print("  Linux: sudo apt-get install ffmpeg")
-        return False
+    
+    print("⚠ FFmpeg not found. Please install FFmpeg:")
+    print("  Windows: Download from https://ffmpeg.org/download.html")
+    print("  macOS: brew install ffmpeg")
+    print("  Linux: sudo apt-get install ffmpeg")
+    return False
 
 def create_env_file():
     """Create .env file from example if it doesn't exist"""
     if not os.path.exists(".env"):
         if os.path.exists(".env.example"):
-            import shutil
             shutil.copy(".env.example", ".env")
             print("✓ Created .env file from example")
         else:
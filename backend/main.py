@@ -1,20 +1,25 @@
-from fastapi import FastAPI
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
+from fastapi.responses import ORJSONResponse
 
+from config import settings
 from database import create_tables
 from routes import auth, media, projects, transcription
+from services.transcription import get_worker_pool, reset_worker_pool, shutdown_worker_pool, warm_up_worker
 
 app = FastAPI(
     title="AI Video Editor API",
     description="Backend API for AI-powered video editing application",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # CORS configuration for frontend communication
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://localhost:5173"],  # Remix dev server
+    allow_origins=list(settings.ALLOWED_ORIGINS),  # Remix dev server
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -28,8 +33,43 @@ app.include_router(transcription.router)
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize database tables on startup"""
+    """Initialize database tables and the transcription worker pool on startup"""
     create_tables()
+    transcription.fail_interrupted_jobs()
+    get_worker_pool()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the transcription worker processes"""
+    shutdown_worker_pool()
+
+@app.post("/warmup")
+async def warmup():
+    """
+    Best-effort load of the transcription model in the workers. One call is
+    submitted per worker, but the pool may hand several to the same process,
+    so some workers can still be cold; warmed_workers reports how many ran one.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_worker_pool()
+    try:
+        worker_pids = await asyncio.gather(*(
+            loop.run_in_executor(pool, warm_up_worker)
+            for _ in range(settings.TRANSCRIPTION_WORKERS)
+        ))
+    except BrokenProcessPool:
+        # A worker died while loading the model; the next call gets a fresh pool
+        reset_worker_pool(pool)
+        raise HTTPException(
+            status_code=503,
+            detail="A transcription worker crashed while loading the model; the pool was restarted, please retry"
+        )
+    return {
+        "status": "ready",
+        "transcription_model": settings.WHISPER_MODEL,
+        "warmed_workers": len(set(worker_pids)),
+        "total_workers": settings.TRANSCRIPTION_WORKERS
+    }
 
 @app.get("/")
 async def root():
@@ -41,4 +81,5 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 if __name__ == "__main__":
+    import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
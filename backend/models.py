@@ -1,13 +1,27 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
+import os
+import time
 import uuid
 
+def uuid7() -> uuid.UUID:
+    """Time-ordered UUID (RFC 9562 version 7): 48-bit ms timestamp + random bits"""
+    timestamp_ms = time.time_ns() // 1_000_000
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = (value & ~(0xF << 76)) | (0x7 << 76)  # version 7
+    value = (value & ~(0x3 << 62)) | (0x2 << 62)  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
+def generate_id() -> str:
+    """Primary key default; time-ordered so new rows append to the index"""
+    return str(uuid7())
+
 class User(Base):
     __tablename__ = "users"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=generate_id)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -20,14 +34,14 @@ class User(Base):
 class Project(Base):
     __tablename__ = "projects"
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=generate_id)
     name = Column(String, nullable=False)
     duration = Column(Float, default=0.0)
     fps = Column(Integer, default=30)
     resolution_width = Column(Integer, default=1920)
     resolution_height = Column(Integer, default=1080)
     tracks_data = Column(JSON)  # Store track and clip data as JSON
-    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -36,8 +50,11 @@ class Project(Base):
 
 class MediaFile(Base):
     __tablename__ = "media_files"
+    __table_args__ = (
+        Index("ix_media_owner_created", "owner_id", "created_at"),
+    )
     
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(String, primary_key=True, default=generate_id)
     filename = Column(String, nullable=False)
     original_filename = Column(String, nullable=False)
     file_type = Column(String, nullable=False)  # 'video', 'audio', 'image'
@@ -45,9 +62,24 @@ class MediaFile(Base):
     duration = Column(Float, nullable=True)  # For video/audio files
     file_url = Column(String, nullable=False)
     thumbnail_url = Column(String, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 hex digest
+    pcm16k_url = Column(String, nullable=True)  # Decoded 16kHz mono float32 audio (.f32) for transcription
     metadata = Column(JSON)  # Store width, height, fps, codec, etc.
-    owner_id = Column(String, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False)  # Indexed via ix_media_owner_created
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    owner = relationship("User", back_populates="media_files")
\ No newline at end of file
+    owner = relationship("User", back_populates="media_files")
+
+class TranscriptionJob(Base):
+    __tablename__ = "transcription_jobs"
+    
+    id = Column(String, primary_key=True, default=generate_id)
+    media_file_id = Column(String, ForeignKey("media_files.id"), nullable=False)
+    owner_id = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="queued")  # 'queued', 'completed', 'failed'
+    runner_id = Column(String, nullable=True, index=True)  # "<hostname>:<pid>" of the API process running the job
+    result = Column(JSON, nullable=True)  # Serialized TranscriptionResult once completed
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
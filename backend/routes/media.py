@@ -1,16 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File
+from fastapi.responses import FileResponse, Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import os
+import mimetypes
+from urllib.parse import quote
 
+from ..config import settings
 from ..database import get_db
 from ..models import User, MediaFile
 from ..schemas import MediaFileResponse, UploadResponse, APIResponse
 from ..auth import get_current_user
-from ..storage import upload_file_to_storage, generate_thumbnail
+from ..storage import upload_file_to_storage
 
 router = APIRouter(prefix="/media", tags=["media"])
 
+# Validates and serializes a whole list of rows in one pydantic-core call
+_MEDIA_LIST_ADAPTER = TypeAdapter(List[MediaFileResponse])
+
 @router.post("/upload", response_model=UploadResponse)
 async def upload_media_file(
     file: UploadFile = File(...),
@@ -18,23 +27,23 @@ async def upload_media_file(
     db: Session = Depends(get_db)
 ):
     """Upload a media file (video, audio, or image)"""
+    stored = None
     try:
-        # Upload file and extract metadata
-        file_path, file_type, metadata = await upload_file_to_storage(file)
-        
-        # Generate thumbnail
-        thumbnail_path = await generate_thumbnail(file_path, file_type)
+        # Upload file, extract metadata and generate thumbnail
+        stored = await upload_file_to_storage(file)
         
         # Create database record
         db_media = MediaFile(
-            filename=os.path.basename(file_path),
+            filename=os.path.basename(stored.file_path),
             original_filename=file.filename,
-            file_type=file_type,
-            file_size=file.size,
-            duration=metadata.get('duration'),
-            file_url=file_path,
-            thumbnail_url=thumbnail_path,
-            metadata=metadata,
+            file_type=stored.file_type,
+            file_size=os.path.getsize(stored.file_path),
+            duration=stored.metadata.get('duration'),
+            file_url=stored.file_path,
+            thumbnail_url=stored.thumbnail_path,
+            content_hash=stored.content_hash,
+            pcm16k_url=stored.pcm16k_path,
+            metadata=stored.metadata,
             owner_id=current_user.id
         )
         
@@ -48,7 +57,13 @@ async def upload_media_file(
             file=db_media
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
+        # Don't leave files behind for a record that was never created
+        if stored is not None:
+            db.rollback()
+            _unlink_best_effort([stored.file_path, stored.thumbnail_path, stored.pcm16k_path])
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @router.get("/", response_model=List[MediaFileResponse])
@@ -57,8 +72,19 @@ async def get_media_files(
     db: Session = Depends(get_db)
 ):
     """Get all media files for the current user"""
-    media_files = db.query(MediaFile).filter(MediaFile.owner_id == current_user.id).all()
-    return media_files
+    media_files = db.scalars(
+        select(MediaFile)
+        .where(MediaFile.owner_id == current_user.id)
+        .order_by(MediaFile.created_at)
+    ).all()
+    
+    # Returning a Response skips FastAPI's per-item re-validation of response_model
+    return Response(
+        content=_MEDIA_LIST_ADAPTER.dump_json(
+            _MEDIA_LIST_ADAPTER.validate_python(media_files, from_attributes=True)
+        ),
+        media_type="application/json"
+    )
 
 @router.get("/{media_id}", response_model=MediaFileResponse)
 async def get_media_file(
@@ -67,45 +93,82 @@ async def get_media_file(
     db: Session = Depends(get_db)
 ):
     """Get a specific media file"""
-    media_file = db.query(MediaFile).filter(
-        MediaFile.id == media_id,
-        MediaFile.owner_id == current_user.id
-    ).first()
+    media_file = db.get(MediaFile, media_id)
     
-    if not media_file:
+    if media_file is None or media_file.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Media file not found")
     
     return media_file
 
+@router.get("/{media_id}/raw")
+async def download_media_file(
+    media_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Download the raw media file"""
+    media_file = db.get(MediaFile, media_id)
+    
+    if media_file is None or media_file.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Media file not found")
+    
+    media_type = mimetypes.guess_type(media_file.original_filename)[0] or "application/octet-stream"
+    
+    # Let NGINX serve the bytes from its internal location
+    if settings.X_ACCEL_REDIRECT_PREFIX:
+        return Response(
+            media_type=media_type,
+            headers={
+                "X-Accel-Redirect": settings.X_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + os.path.basename(media_file.file_url),
+                "Content-Disposition": f"attachment; filename*=utf-8''{quote(media_file.original_filename)}"
+            }
+        )
+    
+    if not os.path.exists(media_file.file_url):
+        raise HTTPException(status_code=404, detail="Media file not found on disk")
+    
+    # FileResponse streams with sendfile where the server supports it
+    return FileResponse(
+        media_file.file_url,
+        media_type=media_type,
+        filename=media_file.original_filename
+    )
+
 @router.delete("/{media_id}", response_model=APIResponse)
 async def delete_media_file(
     media_id: str,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Delete a media file"""
-    media_file = db.query(MediaFile).filter(
-        MediaFile.id == media_id,
-        MediaFile.owner_id == current_user.id
-    ).first()
+    media_file = db.get(MediaFile, media_id)
     
-    if not media_file:
+    if media_file is None or media_file.owner_id != current_user.id:
         raise HTTPException(status_code=404, detail="Media file not found")
     
-    # Delete physical files
-    try:
-        if os.path.exists(media_file.file_url):
-            os.remove(media_file.file_url)
-        if media_file.thumbnail_url and os.path.exists(media_file.thumbnail_url):
-            os.remove(media_file.thumbnail_url)
-    except Exception as e:
-        print(f"Error deleting files: {e}")
+    paths = [media_file.file_url, media_file.thumbnail_url, media_file.pcm16k_url]
     
     # Delete database record
     db.delete(media_file)
     db.commit()
     
+    # Delete physical files after the response has been sent
+    background_tasks.add_task(_unlink_best_effort, paths)
+    
     return APIResponse(
         success=True,
         message="Media file deleted successfully"
-    )
\ No newline at end of file
+    )
+
+def _unlink_best_effort(paths: List[Optional[str]]) -> None:
+    """Remove files from disk, ignoring ones that are already gone"""
+    for path in paths:
+        if not path:
+            continue
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error deleting file {path}: {e}")
@@ -1,22 +1,35 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
-from database import get_db
-from models import MediaFile, User
-from schemas import TranscriptionRequest, TranscriptionResponse
-from services.transcription import transcription_service
+from typing import Optional
+from config import settings
+from database import get_db, SessionLocal
+from models import MediaFile, TranscriptionJob, User
+from schemas import TranscriptionRequest, TranscriptionResponse, TranscriptionResult
+from services.transcription import get_worker_pool, reset_worker_pool, run_transcription_job
 from auth import get_current_user
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
 import os
+import socket
 
 router = APIRouter(prefix="/transcription", tags=["transcription"])
 
-@router.post("/transcribe", response_model=TranscriptionResponse)
+# Jobs handed to the worker pool and not finished yet
+_pending_jobs: set[asyncio.Task] = set()
+
+# Identifies this API process as the runner of the jobs it queues
+HOSTNAME = socket.gethostname()
+RUNNER_ID = f"{HOSTNAME}:{os.getpid()}"
+
+@router.post("/transcribe", response_model=TranscriptionResponse, status_code=status.HTTP_202_ACCEPTED)
 async def transcribe_media(
     request: TranscriptionRequest,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    Transcribe audio/video file using Whisper AI
+    Queue an audio/video file for transcription using Whisper AI
     
     Args:
         request: TranscriptionRequest containing media_file_id
@@ -24,7 +37,7 @@ async def transcribe_media(
         db: Database session
         
     Returns:
-        TranscriptionResponse with transcription results
+        TranscriptionResponse with the job id to poll for results
     """
     try:
         # Get the media file from database
@@ -59,16 +72,34 @@ async def transcribe_media(
                 detail="Media file not found on disk"
             )
         
-        # Perform transcription
-        transcription_result = transcription_service.transcribe_file(
-            file_path, 
-            media_file.file_type
+        # Bound the backlog so a burst of requests can't queue unbounded work
+        if len(_pending_jobs) >= settings.TRANSCRIPTION_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many transcriptions in progress. Please try again later."
+            )
+        
+        job = TranscriptionJob(
+            media_file_id=media_file.id,
+            owner_id=current_user.id,
+            runner_id=RUNNER_ID
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        
+        # Run Whisper in a worker process and record the outcome when it finishes
+        task = asyncio.create_task(
+            _run_job(job.id, file_path, media_file.file_type, media_file.pcm16k_url)
         )
+        _pending_jobs.add(task)
+        task.add_done_callback(_pending_jobs.discard)
         
         return TranscriptionResponse(
             success=True,
-            message="Transcription completed successfully",
-            transcription=transcription_result
+            message="Transcription queued",
+            job_id=job.id,
+            status=job.status
         )
         
     except HTTPException:
@@ -77,4 +108,166 @@ async def transcribe_media(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Transcription failed: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/{job_id}", response_model=TranscriptionResponse)
+async def get_transcription_job(
+    job_id: str,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Poll a transcription job for its status and result"""
+    job = db.get(TranscriptionJob, job_id)
+    
+    if job is None or job.owner_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Transcription job not found"
+        )
+    
+    if job.status == "completed":
+        return TranscriptionResponse(
+            success=True,
+            message="Transcription completed successfully",
+            job_id=job.id,
+            status=job.status,
+            transcription=TranscriptionResult(**job.result)
+        )
+    
+    if job.status == "failed":
+        return TranscriptionResponse(
+            success=False,
+            message=f"Transcription failed: {job.error}",
+            job_id=job.id,
+            status=job.status
+        )
+    
+    return TranscriptionResponse(
+        success=True,
+        message="Transcription in progress",
+        job_id=job.id,
+        status=job.status
+    )
+
+async def _run_job(job_id: str, file_path: str, file_type: str, pcm16k_path: Optional[str] = None) -> None:
+    """Execute a queued job in the process pool and store its outcome"""
+    loop = asyncio.get_running_loop()
+    try:
+        # Retry once on a fresh pool if a worker process died under us
+        for attempt in range(2):
+            pool = get_worker_pool()
+            try:
+                result = await loop.run_in_executor(
+                    pool, run_transcription_job, file_path, file_type, pcm16k_path
+                )
+                break
+            except BrokenProcessPool:
+                reset_worker_pool(pool)
+                if attempt:
+                    raise
+        await asyncio.to_thread(_finish_job, job_id, "completed", result=result)
+    except asyncio.CancelledError:
+        # Shutdown cancels pool futures; record the failure synchronously since
+        # the default executor may already be going away, then propagate
+        _finish_job(job_id, "failed", error="interrupted by shutdown")
+        raise
+    except BrokenProcessPool:
+        await asyncio.to_thread(
+            _finish_job, job_id, "failed", error="transcription worker process crashed"
+        )
+    except Exception as e:
+        await asyncio.to_thread(_finish_job, job_id, "failed", error=str(e))
+
+def _finish_job(job_id: str, job_status: str, result: Optional[dict] = None, error: Optional[str] = None) -> None:
+    """
+    Write a job's final status with its own session (runs outside any request).
+    Only a still-queued job is updated, so a final status is never overwritten.
+    """
+    db = SessionLocal()
+    try:
+        db.query(TranscriptionJob).filter(
+            TranscriptionJob.id == job_id,
+            TranscriptionJob.status == "queued"
+        ).update(
+            {"status": job_status, "result": result, "error": error},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def fail_interrupted_jobs() -> None:
+    """
+    Mark queued jobs whose API process is gone as failed; nothing resumes them.
+    Only runners on this host can be checked, so jobs queued by other hosts
+    are left alone. Jobs without a runner predate runner tracking.
+    """
+    db = SessionLocal()
+    try:
+        runner_ids = [
+            runner_id for (runner_id,) in db.query(TranscriptionJob.runner_id)
+            .filter(TranscriptionJob.status == "queued")
+            .distinct()
+        ]
+        dead_runners = [runner_id for runner_id in runner_ids if _runner_is_dead(runner_id)]
+        if not dead_runners:
+            return
+        
+        query = db.query(TranscriptionJob).filter(TranscriptionJob.status == "queued")
+        if None in dead_runners:
+            query = query.filter(or_(
+                TranscriptionJob.runner_id.in_([r for r in dead_runners if r is not None]),
+                TranscriptionJob.runner_id.is_(None)
+            ))
+        else:
+            query = query.filter(TranscriptionJob.runner_id.in_(dead_runners))
+        
+        query.update(
+            {"status": "failed", "error": "interrupted by restart"},
+            synchronize_session=False
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def _runner_is_dead(runner_id: Optional[str]) -> bool:
+    """Whether the API process that queued a job is known to have exited"""
+    if runner_id is None:
+        return True
+    
+    host, _, pid = runner_id.rpartition(":")
+    if host != HOSTNAME or not pid.isdigit():
+        return False
+    
+    # A queued job carrying our own pid came from an earlier process that reused it
+    if int(pid) == os.getpid():
+        return True
+    
+    return not _pid_alive(int(pid))
+
+def _pid_alive(pid: int) -> bool:
+    """Check whether a local process is still running"""
+    if os.name == "nt":
+        # os.kill would terminate the process on Windows, so ask the kernel instead
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+    
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists but owned by another user
+        return True
+    return True
\ No newline at end of file
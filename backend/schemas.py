@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr
 from typing import Optional, Dict, Any, List
 from datetime import datetime
 
@@ -13,8 +13,7 @@ class UserResponse(UserBase):
     id: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Project schemas
 class ProjectBase(BaseModel):
@@ -42,8 +41,7 @@ class ProjectResponse(ProjectBase):
     created_at: datetime
     updated_at: Optional[datetime]
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Media file schemas
 class MediaFileBase(BaseModel):
@@ -57,12 +55,12 @@ class MediaFileResponse(MediaFileBase):
     duration: Optional[float]
     file_url: str
     thumbnail_url: Optional[str]
+    content_hash: Optional[str] = None
     metadata: Optional[Dict[str, Any]]
     owner_id: str
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 # Authentication schemas
 class Token(BaseModel):
@@ -90,6 +88,8 @@ class TranscriptionRequest(BaseModel):
 class TranscriptionResponse(BaseModel):
     success: bool
     message: str
+    job_id: Optional[str] = None
+    status: Optional[str] = None  # 'queued', 'completed', 'failed'
     transcription: Optional[TranscriptionResult] = None
 
 # API Response schemas
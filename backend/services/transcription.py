@@ -0,0 +1,153 @@
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from config import settings
+from schemas import TranscriptionResult, TranscriptionSegment
+
+SAMPLE_RATE = 16000  # Whisper's input sample rate
+BATCHED_MIN_DURATION = 30  # Seconds; shorter audio fits in one Whisper window
+
+class TranscriptionService:
+    """Transcribe audio/video files with Whisper (CTranslate2 via faster-whisper)"""
+    
+    def __init__(
+        self,
+        model_name: str = settings.WHISPER_MODEL,
+        device: str = settings.WHISPER_DEVICE,
+        compute_type: Optional[str] = settings.WHISPER_COMPUTE_TYPE
+    ):
+        # Loading the model is the expensive part, so it happens here and
+        # only when the service is first requested through get_service()
+        from faster_whisper import BatchedInferencePipeline, WhisperModel
+        
+        self.model_name = model_name
+        self._model = WhisperModel(
+            model_name,
+            device=device,
+            compute_type=compute_type or _default_compute_type(device)
+        )
+        self._pipeline = BatchedInferencePipeline(model=self._model)
+    
+    def transcribe_file(self, file_path: str, file_type: str, pcm16k_path: Optional[str] = None) -> TranscriptionResult:
+        """
+        Transcribe an audio or video file
+        
+        Args:
+            file_path: Path to the media file on disk
+            file_type: 'audio' or 'video' (both are decoded to 16kHz mono via PyAV)
+            pcm16k_path: Optional raw float32 (.f32) sidecar with the audio
+                already decoded at upload time; used instead of decoding
+                file_path again
+            
+        Returns:
+            TranscriptionResult with timed segments
+        """
+        # np.memmap can't map an empty file, so an empty sidecar falls back too
+        if pcm16k_path and os.path.exists(pcm16k_path) and os.path.getsize(pcm16k_path) > 0:
+            import numpy as np
+            audio = np.memmap(pcm16k_path, dtype=np.float32, mode="r")
+        else:
+            from faster_whisper import decode_audio
+            audio = decode_audio(file_path, sampling_rate=SAMPLE_RATE)
+        
+        # Greedy decoding: roughly twice as fast as the default beam of 5
+        if len(audio) < BATCHED_MIN_DURATION * SAMPLE_RATE:
+            # A single 30s window, nothing to batch
+            raw_segments, info = self._model.transcribe(audio, beam_size=1)
+        else:
+            # Cut silence with VAD and decode the speech chunks in batches
+            raw_segments, info = self._pipeline.transcribe(
+                audio,
+                beam_size=1,
+                batch_size=settings.WHISPER_BATCH_SIZE,
+                vad_filter=True,
+                vad_parameters=dict(min_silence_duration_ms=500)
+            )
+        
+        # raw_segments is a generator; decoding happens as it is consumed
+        segments = [
+            TranscriptionSegment(
+                text=segment.text.strip(),
+                start=float(segment.start),
+                end=float(segment.end),
+                confidence=math.exp(segment.avg_logprob)
+            )
+            for segment in raw_segments
+        ]
+        
+        return TranscriptionResult(
+            segments=segments,
+            language=info.language,
+            duration=float(info.duration)
+        )
+
+def _default_compute_type(device: str) -> str:
+    """int8 weights everywhere; keep float16 activations when running on a GPU"""
+    import ctranslate2
+    
+    if device == "cuda" or (device == "auto" and ctranslate2.get_cuda_device_count() > 0):
+        return "int8_float16"
+    return "int8"
+
+_instance: Optional[TranscriptionService] = None
+_lock = threading.Lock()
+
+def get_service() -> TranscriptionService:
+    """Return the shared TranscriptionService, loading the model on first use"""
+    global _instance
+    if _instance is None:
+        with _lock:
+            if _instance is None:
+                _instance = TranscriptionService()
+    return _instance
+
+def run_transcription_job(file_path: str, file_type: str, pcm16k_path: Optional[str] = None) -> dict:
+    """
+    Entry point executed inside a worker process. Each worker loads its own
+    model once via get_service() and returns a plain dict so the result
+    pickles cheaply back to the API process.
+    """
+    return get_service().transcribe_file(file_path, file_type, pcm16k_path).model_dump()
+
+def warm_up_worker() -> int:
+    """Load the model inside a worker process and return that worker's pid"""
+    get_service()
+    return os.getpid()
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def get_worker_pool() -> ProcessPoolExecutor:
+    """Return the process pool that runs transcriptions, creating it if needed"""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=settings.TRANSCRIPTION_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+def shutdown_worker_pool() -> None:
+    """Stop the worker processes, dropping transcriptions that haven't started"""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+def reset_worker_pool(broken_pool: ProcessPoolExecutor) -> None:
+    """
+    Discard a pool that raised BrokenProcessPool (a worker died, e.g. OOM
+    or a native crash) so the next get_worker_pool() builds a fresh one.
+    Does nothing if another caller already replaced it.
+    """
+    global _pool
+    with _lock:
+        if _pool is broken_pool:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
\ No newline at end of file
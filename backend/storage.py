@@ -1,26 +1,48 @@
 import os
 import uuid
-import shutil
-from typing import Optional
+import asyncio
+import hashlib
+from typing import NamedTuple, Optional
 from fastapi import UploadFile, HTTPException
-from PIL import Image
-import ffmpeg
-import tempfile
+
+from .config import settings
 
 # Storage configuration
-UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
-THUMBNAIL_DIR = os.getenv("THUMBNAIL_DIR", "./thumbnails")
-MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+UPLOAD_DIR = settings.UPLOAD_DIR
+THUMBNAIL_DIR = settings.THUMBNAIL_DIR
+MAX_FILE_SIZE = settings.MAX_FILE_SIZE
+COPY_BUFFER_SIZE = 1024 * 1024  # 1MB chunks when copying uploads to disk
+THUMBNAIL_SIZE = (320, 240)
+THUMBNAIL_TIME = 1.0  # Seconds into the video to grab the thumbnail frame
+PCM_SAMPLE_RATE = 16000  # Sample rate of the decoded audio sidecar (Whisper's input rate)
+# Largest decoded sidecar written at upload (float32 mono is 64KB/s, so ~1.7h).
+# Longer audio is decoded by the transcription worker instead.
+PCM_MAX_SIZE = 4 * MAX_FILE_SIZE
 
-# Ensure directories exist
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+# Directories already created by this process
+_ensured_dirs: set[str] = set()
 
 # Supported file types
 SUPPORTED_VIDEO_TYPES = {".mp4", ".mov", ".avi", ".mkv", ".webm"}
 SUPPORTED_AUDIO_TYPES = {".mp3", ".wav", ".aac", ".m4a", ".ogg"}
 SUPPORTED_IMAGE_TYPES = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 
+class StoredUpload(NamedTuple):
+    """Result of saving and processing an uploaded file"""
+    file_path: str
+    file_type: str
+    metadata: dict
+    thumbnail_path: Optional[str]
+    content_hash: str
+    pcm16k_path: Optional[str]
+
+def ensure_dir(path: str) -> None:
+    """Create a directory once per process; later calls skip the stat syscall"""
+    if path in _ensured_dirs:
+        return
+    os.makedirs(path, exist_ok=True)
+    _ensured_dirs.add(path)
+
 def get_file_type(filename: str) -> str:
     """Determine file type based on extension"""
     ext = os.path.splitext(filename)[1].lower()
@@ -38,120 +60,235 @@ def get_file_type(filename: str) -> str:
         )
 
 def validate_file(file: UploadFile) -> None:
-    """Validate uploaded file"""
-    if file.size > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
-        )
-    
+    """Validate uploaded file (size is enforced while the file is copied)"""
     # Validate file type
     get_file_type(file.filename)
 
-async def upload_file_to_storage(file: UploadFile) -> tuple[str, str, dict]:
+async def upload_file_to_storage(file: UploadFile) -> StoredUpload:
     """
-    Upload file to storage and return file path, file type, and metadata
+    Upload file to storage and return its path, type, metadata, thumbnail,
+    content hash and decoded audio sidecar
     """
     validate_file(file)
     
     # Generate unique filename
     file_ext = os.path.splitext(file.filename)[1].lower()
     unique_filename = f"{uuid.uuid4()}{file_ext}"
+    ensure_dir(UPLOAD_DIR)
     file_path = os.path.join(UPLOAD_DIR, unique_filename)
     
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
     file_type = get_file_type(file.filename)
-    metadata = {}
     
-    # Extract metadata based on file type
+    # Save the file and extract metadata/thumbnail off the event loop
+    return await asyncio.to_thread(
+        _save_and_probe, file.file, file_path, file_type
+    )
+
+def _save_and_probe(src, file_path: str, file_type: str) -> StoredUpload:
+    """Blocking part of the upload: write the file to disk, then probe it"""
+    try:
+        with open(file_path, "wb") as buffer:
+            content_hash = _copy_upload(src, buffer)
+    except Exception:
+        # Don't leave a partial upload behind
+        try:
+            os.unlink(file_path)
+        except FileNotFoundError:
+            pass
+        raise
+    
+    # Extract metadata, thumbnail and decoded audio from a single open of the file
+    metadata, thumbnail_path, pcm16k_path = probe_media(file_path, file_type)
+    
+    return StoredUpload(file_path, file_type, metadata, thumbnail_path, content_hash, pcm16k_path)
+
+def _copy_upload(src, dst) -> str:
+    """
+    Copy an uploaded file to dst in 1MB chunks, hashing each chunk on the
+    way through, and return the SHA-256 hex digest of the content.
+    Stops as soon as the upload exceeds MAX_FILE_SIZE.
+    """
+    digest = hashlib.sha256()
+    written = 0
+    while chunk := src.read(COPY_BUFFER_SIZE):
+        written += len(chunk)
+        if written > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)}MB"
+            )
+        dst.write(chunk)
+        digest.update(chunk)
+    
+    return digest.hexdigest()
+
+def probe_media(file_path: str, file_type: str) -> tuple[dict, Optional[str], Optional[str]]:
+    """
+    Extract metadata, generate a thumbnail and decode the audio track to the
+    16kHz sidecar used by transcription, opening the file only once.
+    Returns (metadata, thumbnail_path, pcm16k_path).
+    """
     if file_type == "video":
-        metadata = extract_video_metadata(file_path)
+        return _probe_video(file_path)
     elif file_type == "audio":
-        metadata = extract_audio_metadata(file_path)
+        # Audio files have no thumbnail
+        metadata, pcm16k_path = _probe_audio(file_path)
+        return metadata, None, pcm16k_path
     elif file_type == "image":
-        metadata = extract_image_metadata(file_path)
+        metadata, thumbnail_path = _probe_image_and_thumbnail(file_path)
+        return metadata, thumbnail_path, None
     
-    return file_path, file_type, metadata
+    return {}, None, None
 
-def extract_video_metadata(file_path: str) -> dict:
-    """Extract metadata from video file"""
+def _probe_video(file_path: str) -> tuple[dict, Optional[str], Optional[str]]:
+    """Read video metadata, grab a thumbnail frame and decode audio from the same container"""
+    import av
+    metadata = {}
+    thumbnail_path = None
+    pcm16k_path = None
     try:
-        probe = ffmpeg.probe(file_path)
-        video_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'video'), None)
-        
-        if video_stream:
-            return {
-                "width": int(video_stream.get('width', 0)),
-                "height": int(video_stream.get('height', 0)),
-                "duration": float(probe['format'].get('duration', 0)),
-                "fps": eval(video_stream.get('r_frame_rate', '30/1')),
-                "codec": video_stream.get('codec_name', 'unknown')
-            }
+        with av.open(file_path, metadata_errors="ignore") as container:
+            video_stream = next((stream for stream in container.streams if stream.type == 'video'), None)
+            if not video_stream:
+                return metadata, thumbnail_path, pcm16k_path
+            
+            metadata = _video_stream_metadata(container, video_stream)
+            
+            try:
+                # Seek to the keyframe before THUMBNAIL_TIME, then decode forward
+                if container.duration and container.duration / av.time_base > THUMBNAIL_TIME:
+                    container.seek(int(THUMBNAIL_TIME * av.time_base))
+                
+                frame = None
+                for frame in container.decode(video_stream):
+                    if frame.time is None or frame.time >= THUMBNAIL_TIME:
+                        break
+                
+                if frame is not None:
+                    thumbnail_path = _new_thumbnail_path()
+                    img = frame.to_image()
+                    img.thumbnail(THUMBNAIL_SIZE)
+                    img.save(thumbnail_path, "JPEG")
+            except Exception as e:
+                print(f"Error generating thumbnail: {e}")
+                thumbnail_path = None
+            
+            audio_stream = next((stream for stream in container.streams if stream.type == 'audio'), None)
+            if audio_stream:
+                pcm16k_path = _write_pcm16k(container, audio_stream, file_path)
     except Exception as e:
         print(f"Error extracting video metadata: {e}")
     
-    return {}
+    return metadata, thumbnail_path, pcm16k_path
 
-def extract_audio_metadata(file_path: str) -> dict:
-    """Extract metadata from audio file"""
+def _probe_audio(file_path: str) -> tuple[dict, Optional[str]]:
+    """Read audio metadata and decode the track from the same container"""
+    import av
+    metadata = {}
+    pcm16k_path = None
     try:
-        probe = ffmpeg.probe(file_path)
-        audio_stream = next((stream for stream in probe['streams'] if stream['codec_type'] == 'audio'), None)
-        
-        if audio_stream:
-            return {
-                "duration": float(probe['format'].get('duration', 0)),
-                "codec": audio_stream.get('codec_name', 'unknown'),
-                "sample_rate": int(audio_stream.get('sample_rate', 0)),
-                "channels": int(audio_stream.get('channels', 0))
+        with av.open(file_path, metadata_errors="ignore") as container:
+            audio_stream = next((stream for stream in container.streams if stream.type == 'audio'), None)
+            if not audio_stream:
+                return metadata, pcm16k_path
+            
+            metadata = {
+                "duration": _container_duration(container),
+                "codec": audio_stream.codec_context.name or 'unknown',
+                "sample_rate": audio_stream.codec_context.sample_rate or 0,
+                "channels": audio_stream.codec_context.channels or 0
             }
+            pcm16k_path = _write_pcm16k(container, audio_stream, file_path)
     except Exception as e:
         print(f"Error extracting audio metadata: {e}")
     
-    return {}
+    return metadata, pcm16k_path
 
-def extract_image_metadata(file_path: str) -> dict:
-    """Extract metadata from image file"""
+def _probe_image_and_thumbnail(file_path: str) -> tuple[dict, Optional[str]]:
+    """Read image metadata and write its thumbnail from the same decoded image"""
+    from PIL import Image
+    metadata = {}
+    thumbnail_path = None
     try:
         with Image.open(file_path) as img:
-            return {
+            metadata = {
                 "width": img.width,
                 "height": img.height,
                 "format": img.format
             }
+            
+            try:
+                thumbnail_path = _new_thumbnail_path()
+                img.thumbnail(THUMBNAIL_SIZE)
+                img.convert("RGB").save(thumbnail_path, "JPEG")
+            except Exception as e:
+                print(f"Error generating thumbnail: {e}")
+                thumbnail_path = None
     except Exception as e:
         print(f"Error extracting image metadata: {e}")
     
-    return {}
+    return metadata, thumbnail_path
 
-async def generate_thumbnail(file_path: str, file_type: str) -> Optional[str]:
-    """Generate thumbnail for media file"""
+def _new_thumbnail_path() -> str:
+    """Generate a unique path for a JPEG thumbnail"""
+    ensure_dir(THUMBNAIL_DIR)
+    return os.path.join(THUMBNAIL_DIR, f"{uuid.uuid4()}.jpg")
+
+def _write_pcm16k(container, audio_stream, file_path: str) -> Optional[str]:
+    """
+    Decode an opened audio stream to 16kHz mono float32 and stream each
+    resampled frame straight into a raw .f32 sidecar next to the file,
+    so the decoded track is never held in memory. Returns None (and leaves
+    no sidecar) when the decoded audio would exceed PCM_MAX_SIZE.
+    """
+    import av
+    
+    # Skip decoding entirely when the header already says it won't fit
+    if _container_duration(container) * PCM_SAMPLE_RATE * 4 > PCM_MAX_SIZE:
+        return None
+    
+    pcm16k_path = f"{file_path}.16k.f32"
     try:
-        thumbnail_filename = f"{uuid.uuid4()}.jpg"
-        thumbnail_path = os.path.join(THUMBNAIL_DIR, thumbnail_filename)
-        
-        if file_type == "video":
-            # Generate video thumbnail using ffmpeg
-            (
-                ffmpeg
-                .input(file_path, ss=1)  # Take frame at 1 second
-                .output(thumbnail_path, vframes=1, s='320x240')
-                .overwrite_output()
-                .run(quiet=True)
-            )
-        elif file_type == "image":
-            # Generate image thumbnail using PIL
-            with Image.open(file_path) as img:
-                img.thumbnail((320, 240))
-                img.save(thumbnail_path, "JPEG")
-        else:
-            # For audio files, return None (no thumbnail)
-            return None
-        
-        return thumbnail_path
+        # The container may already have been read (e.g. for a thumbnail)
+        container.seek(0)
+        resampler = av.AudioResampler(format="flt", layout="mono", rate=PCM_SAMPLE_RATE)
+        with open(pcm16k_path, "wb") as sidecar:
+            for frame in container.decode(audio_stream):
+                for resampled in resampler.resample(frame):
+                    sidecar.write(resampled.to_ndarray().tobytes())
+                # Headers can under-report duration; enforce the cap on what's written
+                if sidecar.tell() > PCM_MAX_SIZE:
+                    raise _SidecarTooLarge()
+            # Flush samples still buffered in the resampler
+            for resampled in resampler.resample(None):
+                sidecar.write(resampled.to_ndarray().tobytes())
+        return pcm16k_path
     except Exception as e:
-        print(f"Error generating thumbnail: {e}")
-        return None
\ No newline at end of file
+        if not isinstance(e, _SidecarTooLarge):
+            print(f"Error decoding audio: {e}")
+        try:
+            os.unlink(pcm16k_path)
+        except FileNotFoundError:
+            pass
+    
+    return None
+
+class _SidecarTooLarge(Exception):
+    """Decoded audio passed PCM_MAX_SIZE; transcription decodes it instead"""
+
+def _video_stream_metadata(container, video_stream) -> dict:
+    """Build the metadata dict for an opened video stream"""
+    return {
+        "width": video_stream.codec_context.width,
+        "height": video_stream.codec_context.height,
+        "duration": _container_duration(container),
+        "fps": float(video_stream.average_rate or 30),
+        "codec": video_stream.codec_context.name or 'unknown'
+    }
+
+def _container_duration(container) -> float:
+    """Container duration in seconds (PyAV reports it in av.time_base units)"""
+    import av
+    if container.duration is None:
+        return 0.0
+    return float(container.duration) / av.time_base
@@ -14,7 +14,7 @@ def test_imports():
         import jose
         import passlib
         import PIL
-        import ffmpeg
+        import av
         print("✓ All required packages imported successfully")
         return True
     except ImportError as e: